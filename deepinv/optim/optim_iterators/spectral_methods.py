@@ -34,7 +34,7 @@ class SMIteration(OptimIterator):
         self,
         lamb=10,
         n_iter=50,
-        preprocessing=lambda x: torch.max(1 - 1 / x, torch.tensor(-5.0)),
+        preprocessing=lambda x: torch.clamp(1 - 1 / x, min=-5.0),
         **kwargs,
     ):
         super(SMIteration, self).__init__()
@@ -72,7 +72,7 @@ class fStepSM(fStep):
     def __init__(
         self,
         lamb=10,
-        preprocessing=lambda x: torch.max(1 - 1 / x, torch.tensor(-5.0)),
+        preprocessing=lambda x: torch.clamp(1 - 1 / x, min=-5.0),
         **kwargs,
     ):
         super(fStepSM, self).__init__(**kwargs)
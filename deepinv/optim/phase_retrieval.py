@@ -15,7 +15,7 @@ def default_preprocessing(y, physics):
 
     :return: The preprocessing function values evaluated at y.
     """
-    return torch.max(1 - 1 / y, torch.tensor(-5.0))
+    return torch.clamp(1 - 1 / y, min=-5.0)
 
 
 def correct_global_phase(
@@ -135,6 +135,8 @@ def spectral_methods(
         \end{aligned}
         \end{equation*}
   
+    All the signals of the batch share the same operator ``physics``. Otherwise each signal is processed independently: the measurement normalization, the norm estimate and the power iteration normalization are computed per signal, and with early stopping a signal is no longer updated once it meets the stopping criterion. The iterations stop when all the signals do. Trials with a different sensing matrix each are not supported in a single call.
+
     :param torch.Tensor y: Measurements.
     :param deepinv.physics.Physics physics: Instance of the physics modeling the forward matrix.
     :param torch.Tensor x: Initial guess for the signals :math:`x_0`.
@@ -163,23 +165,33 @@ def spectral_methods(
     #! estimate the norm of x using y
     #! for the i.i.d. case, we have norm(x) = sqrt(sum(y)/A_squared_mean)
     #! for the structured case, when the mean of the squared diagonal elements is 1, we have norm(x) = sqrt(sum(y)), otherwise y gets scaled by the mean to the power of number of layers
-    norm_x = torch.sqrt(y.sum())
+    # every signal of the batch is an independent problem, reduce over all dims but the first
+    y_dims = tuple(range(1, y.dim()))
+    x_dims = tuple(range(1, x.dim()))
+    norm_x = torch.sqrt(y.sum(dim=y_dims)).view(-1, *[1] * len(x_dims))
 
     x = x.to(torch.cfloat)
     # y should have mean 1
-    y = y / torch.mean(y)
+    y = y / torch.mean(y, dim=y_dims, keepdim=True)
     diag_T = preprocessing(y, physics)
     diag_T = diag_T.to(torch.cfloat)
+    # signals of the batch that met the early stopping criterion, they are no longer updated
+    converged = torch.zeros(x.shape[0], dtype=torch.bool, device=x.device)
     for i in range(n_iter):
         x_new = physics.B(x)
         x_new = diag_T * x_new
         x_new = physics.B_adjoint(x_new)
         x_new = x_new + lamb * x
-        x_new = x_new / torch.linalg.norm(x_new)
+        x_new = x_new / torch.linalg.vector_norm(x_new, dim=x_dims, keepdim=True)
         if log:
             metrics.append(log_metric(x_new, x_true))
         if early_stop:
-            if torch.linalg.norm(x_new - x) / torch.linalg.norm(x) < rtol:
+            rel_change = torch.linalg.vector_norm(
+                x_new - x, dim=x_dims
+            ) / torch.linalg.vector_norm(x, dim=x_dims)
+            converged = converged | (rel_change < rtol)
+            x_new = torch.where(converged.view(-1, *[1] * len(x_dims)), x, x_new)
+            if converged.all():
                 if verbose:
                     print(f"Power iteration early stopped at iteration {i}.")
                 break
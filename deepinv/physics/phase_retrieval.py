@@ -1,4 +1,4 @@
-from functools import partial
+from functools import lru_cache, partial
 import math
 import torch
 import numpy as np
@@ -11,6 +11,14 @@ from deepinv.physics.structured_random import (
     StructuredRandom,
 )
 
+# structured transforms of StructuredRandomPhaseRetrieval, as (transform, inverse transform)
+_STRUCTURED_TRANSFORMS = {
+    "fft": (
+        partial(torch.fft.fft2, norm="ortho"),
+        partial(torch.fft.ifft2, norm="ortho"),
+    ),
+}
+
 
 class PhaseRetrieval(Physics):
     r"""
@@ -45,7 +53,11 @@ class PhaseRetrieval(Physics):
 
         :param torch.Tensor x: signal/image.
         """
-        return self.B(x, **kwargs).abs().square()
+        Bx = self.B(x, **kwargs)
+        if Bx.is_complex():
+            # squared modulus without the square root computed by abs()
+            return Bx.real.square().add_(Bx.imag.square())
+        return Bx.square()
 
     def A_dagger(self, y: torch.Tensor, **kwargs) -> torch.Tensor:
         r"""
@@ -94,11 +106,18 @@ class PhaseRetrieval(Physics):
         :param torch.Tensor v: vector.
         :return: (:class:`torch.Tensor`) the VJP product between :math:`v` and the Jacobian.
         """
-        return 2 * self.B_adjoint(self.B(x) * v)
+        # B(x) may be a view of x, only the output of the adjoint is owned here
+        return self.B_adjoint(self.B(x) * v).mul_(2)
 
     def release_memory(self):
+        r"""
+        Deletes the linear operator :math:`B` to free its memory.
+
+        When CUDA is available, the cached memory is also released with :func:`torch.cuda.empty_cache`.
+        """
         del self.B
-        torch.cuda.empty_cache()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
         return
 
 
@@ -205,6 +224,8 @@ class StructuredRandomPhaseRetrieval(PhaseRetrieval):
     :param bool shared_weights: if True, the same diagonal matrix is used for all layers. Default is False.
     :param torch.dtype dtype: Signals are processed in dtype. Default is torch.cfloat.
     :param str device: Device for computation. Default is `cpu`.
+    :param torch.Generator rng: (optional) a pseudorandom random number generator for the generation of the diagonals.
+        If ``None``, the default Generator of PyTorch will be used, and ``initial_random_state`` is ``None``.
     """
 
     def __init__(
@@ -217,6 +238,7 @@ class StructuredRandomPhaseRetrieval(PhaseRetrieval):
         shared_weights=False,
         dtype=torch.cfloat,
         device="cpu",
+        rng: torch.Generator = None,
         **kwargs,
     ):
         if output_shape is None:
@@ -224,64 +246,60 @@ class StructuredRandomPhaseRetrieval(PhaseRetrieval):
 
         self.input_shape = input_shape
         self.output_shape = output_shape
-        self.n = torch.prod(torch.tensor(self.input_shape))
-        self.m = torch.prod(torch.tensor(self.output_shape))
+        self.n = math.prod(self.input_shape)
+        self.m = math.prod(self.output_shape)
         self.oversampling_ratio = self.m / self.n
         assert (
             n_layers % 1 == 0.5 or n_layers % 1 == 0
         ), "n_layers must be an integer or an integer plus 0.5"
         self.n_layers = n_layers
+        # one diagonal D_i per full layer, the half layer has none
+        self.n_full_layers = math.floor(n_layers)
         self.structure = self.get_structure(self.n_layers)
         self.shared_weights = shared_weights
 
         self.dtype = dtype
         self.device = device
+        if rng is not None:
+            # Make sure that the random generator is on the same device as the physic generator
+            assert rng.device == torch.device(
+                device
+            ), f"The random generator is not on the same device as the Physics Generator. Got random generator on {rng.device} and the Physics Generator on {self.device}."
+        self.rng = rng
+        # None when the default Generator of PyTorch is used
+        self.initial_random_state = rng.get_state() if rng is not None else None
 
         self.mode = compare(input_shape, output_shape)
 
-        # generate diagonal matrices
-        self.diagonals = []
+        # generate diagonal matrices, stored as a single (N, C, H, W) tensor
+        if self.mode == "oversampling":
+            diagonal_shape = tuple(self.output_shape)
+        else:
+            diagonal_shape = tuple(self.input_shape)
 
         if not shared_weights:
-            for _ in range(math.floor(self.n_layers)):
-                if self.mode == "oversampling":
-                    diagonal = generate_diagonal(
-                        shape=self.output_shape,
-                        mode=diagonal_mode,
-                        dtype=self.dtype,
-                        device=self.device,
-                    )
-                else:
-                    diagonal = generate_diagonal(
-                        shape=self.input_shape,
-                        mode=diagonal_mode,
-                        dtype=self.dtype,
-                        device=self.device,
-                    )
-                self.diagonals.append(diagonal)
+            # all layers follow the same distribution, draw them in a single call
+            diagonals = generate_diagonal(
+                shape=(self.n_full_layers,) + diagonal_shape,
+                mode=diagonal_mode,
+                dtype=self.dtype,
+                device=self.device,
+                generator=self.rng,
+            )
         else:
-            if self.mode == "oversampling":
-                diagonal = generate_diagonal(
-                    shape=self.output_shape,
-                    mode=diagonal_mode,
-                    dtype=self.dtype,
-                    device=self.device,
-                )
-            else:
-                diagonal = generate_diagonal(
-                    shape=self.input_shape,
-                    mode=diagonal_mode,
-                    dtype=self.dtype,
-                    device=self.device,
-                )
-            self.diagonals = self.diagonals + [diagonal] * math.floor(self.n_layers)
+            # a single diagonal, shared by all layers and stored only once
+            diagonals = generate_diagonal(
+                shape=(1,) + diagonal_shape,
+                mode=diagonal_mode,
+                dtype=self.dtype,
+                device=self.device,
+                generator=self.rng,
+            )
 
         # determine transform functions
-        if transform == "fft":
-            transform_func = partial(torch.fft.fft2, norm="ortho")
-            transform_func_inv = partial(torch.fft.ifft2, norm="ortho")
-        else:
+        if transform not in _STRUCTURED_TRANSFORMS:
             raise ValueError(f"Unimplemented transform: {transform}")
+        transform_func, transform_func_inv = _STRUCTURED_TRANSFORMS[transform]
 
         B = StructuredRandom(
             input_shape=self.input_shape,
@@ -290,7 +308,7 @@ class StructuredRandomPhaseRetrieval(PhaseRetrieval):
             n_layers=self.n_layers,
             transform_func=transform_func,
             transform_func_inv=transform_func_inv,
-            diagonals=self.diagonals,
+            diagonals=diagonals,
             **kwargs,
         )
 
@@ -300,6 +318,15 @@ class StructuredRandomPhaseRetrieval(PhaseRetrieval):
     def B_dagger(self, y):
         return self.B.A_adjoint(y)
 
+    @property
+    def diagonals(self) -> torch.Tensor:
+        r"""
+        The diagonals :math:`D_i` of the operator as a (N, C, H, W) tensor, stored in the linear operator :math:`B`.
+
+        With ``shared_weights=True``, all the layers are views of the same diagonal.
+        """
+        return self.B.diagonals.expand(self.n_full_layers, *self.B.diagonals.shape[1:])
+
     def get_A_squared_mean(self):
         if self.n_layers == 0.5:
             print(
@@ -309,6 +336,7 @@ class StructuredRandomPhaseRetrieval(PhaseRetrieval):
         return self.diagonals[0].var() + self.diagonals[0].mean() ** 2
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_structure(n_layers) -> str:
         r"""Returns the structure of the operator as a string.
 
@@ -2,6 +2,7 @@ import math
 from deepinv.physics.functional import dst1
 import numpy as np
 import torch
+import torch.nn.functional as F
 
 from deepinv.physics.forward import LinearPhysics
 
@@ -27,15 +28,14 @@ def compare(input_shape: tuple, output_shape: tuple) -> str:
         )
 
 
-def padding(tensor: torch.Tensor, input_shape: tuple, output_shape: tuple):
+def _padding_sizes(input_shape: tuple, output_shape: tuple) -> tuple:
     r"""
-    Zero padding function for oversampling in structured random phase retrieval.
+    Compute the number of rows and columns added or removed on each side when going from one shape to the other.
 
-    :param torch.Tensor tensor: input tensor.
     :param tuple input_shape: shape of the input tensor.
     :param tuple output_shape: shape of the output tensor.
 
-    :return: (:class:`torch.Tensor`) the zero-padded tensor.
+    :return: (tuple) the sizes ``(left, right, top, bottom)``, in the format expected by :func:`torch.nn.functional.pad`.
     """
     change_top = math.ceil(abs(input_shape[1] - output_shape[1]) / 2)
     change_bottom = math.floor(abs(input_shape[1] - output_shape[1]) / 2)
@@ -43,11 +43,40 @@ def padding(tensor: torch.Tensor, input_shape: tuple, output_shape: tuple):
     change_right = math.floor(abs(input_shape[2] - output_shape[2]) / 2)
     assert change_top + change_bottom == abs(input_shape[1] - output_shape[1])
     assert change_left + change_right == abs(input_shape[2] - output_shape[2])
-    return torch.nn.ZeroPad2d((change_left, change_right, change_top, change_bottom))(
-        tensor
+    return change_left, change_right, change_top, change_bottom
+
+
+def _crop_slices(input_shape: tuple, output_shape: tuple) -> tuple:
+    r"""
+    Compute the slices of the height and width dimensions kept when going from the larger shape to the smaller one.
+
+    :param tuple input_shape: shape of the input tensor.
+    :param tuple output_shape: shape of the output tensor.
+
+    :return: (tuple) the slices of the height and width dimensions.
+    """
+    change_left, _, change_top, _ = _padding_sizes(input_shape, output_shape)
+    height = min(input_shape[1], output_shape[1])
+    width = min(input_shape[2], output_shape[2])
+    return (
+        slice(change_top, change_top + height),
+        slice(change_left, change_left + width),
     )
 
 
+def padding(tensor: torch.Tensor, input_shape: tuple, output_shape: tuple):
+    r"""
+    Zero padding function for oversampling in structured random phase retrieval.
+
+    :param torch.Tensor tensor: input tensor.
+    :param tuple input_shape: shape of the input tensor.
+    :param tuple output_shape: shape of the output tensor.
+
+    :return: (:class:`torch.Tensor`) the zero-padded tensor.
+    """
+    return F.pad(tensor, _padding_sizes(input_shape, output_shape))
+
+
 def trimming(tensor: torch.Tensor, input_shape: tuple, output_shape: tuple):
     r"""
     Trimming function for undersampling in structured random phase retrieval.
@@ -58,21 +87,8 @@ def trimming(tensor: torch.Tensor, input_shape: tuple, output_shape: tuple):
 
     :return: (:class:`torch.Tensor`) the trimmed tensor.
     """
-    change_top = math.ceil(abs(input_shape[1] - output_shape[1]) / 2)
-    change_bottom = math.floor(abs(input_shape[1] - output_shape[1]) / 2)
-    change_left = math.ceil(abs(input_shape[2] - output_shape[2]) / 2)
-    change_right = math.floor(abs(input_shape[2] - output_shape[2]) / 2)
-    assert change_top + change_bottom == abs(input_shape[1] - output_shape[1])
-    assert change_left + change_right == abs(input_shape[2] - output_shape[2])
-    if change_bottom == 0:
-        tensor = tensor[..., change_top:, :]
-    else:
-        tensor = tensor[..., change_top:-change_bottom, :]
-    if change_right == 0:
-        tensor = tensor[..., change_left:]
-    else:
-        tensor = tensor[..., change_left:-change_right]
-    return tensor
+    crop_height, crop_width = _crop_slices(input_shape, output_shape)
+    return tensor[..., crop_height, crop_width]
 
 
 def generate_diagonal(
@@ -80,23 +96,32 @@ def generate_diagonal(
     mode: str,
     dtype=torch.cfloat,
     device="cpu",
-    generator=torch.Generator("cpu"),
+    generator: torch.Generator = None,
 ):
     r"""
     Generate a random tensor as the diagonal matrix.
+
+    :param tuple shape: shape of the diagonal.
+    :param str mode: sampling distribution, in ``["uniform_phase", "rademacher"]``.
+    :param torch.dtype dtype: complex dtype of the ``"uniform_phase"`` diagonal. Default is torch.cfloat.
+    :param str device: device of the diagonal. Default is 'cpu'.
+    :param torch.Generator generator: random number generator, on the same device as the diagonal. If None, the default generator of PyTorch is used. Default is None.
+
+    :return: (:class:`torch.Tensor`) the diagonal.
     """
 
     if mode == "uniform_phase":
-        diag = torch.rand(shape)
-        diag = 2 * np.pi * diag
-        diag = torch.exp(1j * diag)
+        # sample in the matching real precision so that polar directly returns dtype
+        real_dtype = dtype.to_real()
+        phase = torch.rand(shape, dtype=real_dtype, device=device, generator=generator)
+        diag = torch.polar(torch.ones_like(phase), 2 * np.pi * phase)
     elif mode == "rademacher":
         diag = torch.where(
             torch.rand(shape, device=device, generator=generator) > 0.5, -1.0, 1.0
         )
     else:
         raise ValueError(f"Unsupported mode: {mode}")
-    return diag.to(device)
+    return diag
 
 
 class StructuredRandom(LinearPhysics):
@@ -114,7 +139,7 @@ class StructuredRandom(LinearPhysics):
     :param float n_layers: number of layers :math:`N`. If ``layers=N + 0.5``, a first :math`F` transform is included, ie :math:`A(x)=|\prod_{i=1}^N (F D_i) F x|^2`. Default is 1.
     :param Callable transform_func: structured transform function. Default is :func:`deepinv.physics.functional.dst1`.
     :param Callable transform_func_inv: structured inverse transform function. Default is :func:`deepinv.physics.functional.dst1`.
-    :param list diagonals: list of diagonal matrices. If None, a random :math:`{-1,+1}` mask matrix will be used. Default is None.
+    :param list, torch.Tensor diagonals: list of diagonal matrices, or a tensor stacking them along its first dimension. A single diagonal matrix is shared by all the layers. Gradients are propagated to diagonals that require grad. If None, a random :math:`{-1,+1}` mask matrix will be used. Default is None.
     :param str device: device of the physics. Default is 'cpu'.
     :param torch.Generator rng: Random number generator. Default is None.
     """
@@ -131,52 +156,79 @@ class StructuredRandom(LinearPhysics):
         rng: torch.Generator = None,
         **kwargs,
     ):
+        super().__init__(**kwargs)
+        self.input_shape = input_shape
+        self.output_shape = output_shape
+        self.n_layers = n_layers
+        # number of (F D_i) layers and whether an extra leading F is applied, resolved once
+        self.n_full_layers = math.floor(n_layers)
+        self.half_layer = n_layers - self.n_full_layers == 0.5
+        self.transform_func = transform_func
+        self.transform_func_inv = transform_func_inv
+        self.device = device
+
         if len(input_shape) == 3:
-            mode = compare(input_shape, output_shape)
+            self.mode = compare(input_shape, output_shape)
+            # padding (oversampling) and trimming (undersampling) only depend on the shapes
+            self.pad = _padding_sizes(input_shape, output_shape)
+            self.crop = _crop_slices(input_shape, output_shape)
         else:
-            mode = None
+            self.mode = None
 
         if diagonals is None:
-            diagonals = [
-                generate_diagonal(
-                    shape=input_shape,
-                    mode="rademacher",
-                    dtype=torch.float,
-                    generator=rng,
-                    device=device,
-                )
-            ]
-
-        def A(x):
-            if mode == "oversampling":
-                x = padding(x, input_shape, output_shape)
-
-            if n_layers - math.floor(n_layers) == 0.5:
-                x = transform_func(x)
-            for i in range(math.floor(n_layers)):
-                diagonal = diagonals[i]
-                x = diagonal * x
-                x = transform_func(x)
-
-            if mode == "undersampling":
-                x = trimming(x, input_shape, output_shape)
-
-            return x
-
-        def A_adjoint(y):
-            if mode == "undersampling":
-                y = padding(y, input_shape, output_shape)
-
-            for i in range(math.floor(n_layers)):
-                diagonal = diagonals[-i - 1]
-                y = transform_func_inv(y)
-                y = torch.conj(diagonal) * y
-            if n_layers - math.floor(n_layers) == 0.5:
-                y = transform_func_inv(y)
-
-            if mode == "oversampling":
-                y = trimming(y, input_shape, output_shape)
-
-            return y
-
-        super().__init__(A=A, A_adjoint=A_adjoint, **kwargs)
+            diagonals = generate_diagonal(
+                shape=(1,) + tuple(input_shape),
+                mode="rademacher",
+                dtype=torch.float,
+                generator=rng,
+                device=device,
+            )
+        elif not isinstance(diagonals, torch.Tensor):
+            # stack the layers into a single (N, ...) tensor
+            diagonals = (
+                torch.stack(list(diagonals), dim=0)
+                if len(diagonals) > 0
+                else torch.empty(0, device=device)
+            )
+        # a single diagonal is shared by all the layers
+        self.shared_weights = len(diagonals) == 1
+        if isinstance(diagonals, torch.nn.Parameter):
+            self.diagonals = diagonals
+        elif diagonals.requires_grad:
+            # keep the graph to the caller's diagonals so that they can be learned
+            self.register_buffer("diagonals", diagonals)
+        else:
+            self.diagonals = torch.nn.Parameter(diagonals, requires_grad=False)
+
+    def A(self, x, **kwargs):
+        if self.mode == "oversampling":
+            x = F.pad(x, self.pad)
+
+        if self.half_layer:
+            x = self.transform_func(x)
+        for i in range(self.n_full_layers):
+            diagonal = self.diagonals[0 if self.shared_weights else i]
+            x = diagonal * x
+            x = self.transform_func(x)
+
+        if self.mode == "undersampling":
+            x = x[..., self.crop[0], self.crop[1]]
+
+        return x
+
+    def A_adjoint(self, y, **kwargs):
+        if self.mode == "undersampling":
+            y = F.pad(y, self.pad)
+
+        for i in range(self.n_full_layers):
+            # lazy conjugate view, no copy of the diagonal is made
+            diagonal = self.diagonals[0 if self.shared_weights else -i - 1].conj()
+            y = self.transform_func_inv(y)
+            y = diagonal * y
+        if self.half_layer:
+            y = self.transform_func_inv(y)
+
+        if self.mode == "oversampling":
+            y = y[..., self.crop[0], self.crop[1]]
+
+        return y
@@ -900,3 +900,41 @@ def test_condition_number(device):
     gt_cond = c.max() / c.min()
     rel_error = (cond - gt_cond).abs() / gt_cond
     assert rel_error < 0.1
+
+
+@pytest.mark.parametrize("early_stop", [False, True])
+def test_spectral_methods_batch(early_stop, device, rng):
+    r"""
+    Tests that spectral methods process every signal of a batch independently.
+
+    :param early_stop: whether the power iterations are early stopped.
+    :param device: (torch.device) cpu or cuda:x
+    :param rng: (torch.Generator) seeded generator, so that the early stopping iteration is reproducible
+    :return: assertion error if the batched estimate differs from the per-signal estimates
+    """
+    physics = dinv.physics.RandomPhaseRetrieval(
+        m=300, img_shape=(1, 6, 6), device=device
+    )
+    x = torch.randn((3, 1, 6, 6), dtype=torch.cfloat, device=device, generator=rng)
+    # signals with very different norms
+    x = x * torch.tensor([0.1, 1.0, 10.0], device=device).view(-1, 1, 1, 1)
+    y = physics(x)
+    x_init = torch.randn(x.shape, dtype=x.dtype, device=device, generator=rng)
+
+    x_batch = dinv.optim.phase_retrieval.spectral_methods(
+        y, physics, x=x_init, n_iter=200, early_stop=early_stop, rtol=1e-3
+    )
+    x_single = torch.cat(
+        [
+            dinv.optim.phase_retrieval.spectral_methods(
+                y[i : i + 1],
+                physics,
+                x=x_init[i : i + 1],
+                n_iter=200,
+                early_stop=early_stop,
+                rtol=1e-3,
+            )
+            for i in range(3)
+        ]
+    )
+    assert torch.allclose(x_batch, x_single, rtol=1e-4, atol=1e-5)
@@ -711,6 +711,145 @@ def test_phase_retrieval(name, device):
     assert torch.equal(physics(x), physics(-x))
 
 
+@pytest.mark.parametrize("n_layers", [1, 2.5])
+def test_structured_random_phase_retrieval_shared_weights(n_layers, device):
+    r"""
+    Tests that the structured random phase retrieval operator with shared weights uses a single diagonal for all layers.
+
+    :param n_layers: number of layers.
+    :param device: (torch.device) cpu or cuda:x
+    :return: asserts the diagonals are shared and the adjoint is well defined.
+    """
+    img_size = (1, 10, 10)
+    physics = dinv.physics.StructuredRandomPhaseRetrieval(
+        input_shape=img_size,
+        output_shape=(1, 12, 12),
+        n_layers=n_layers,
+        shared_weights=True,
+        device=device,
+    )
+    assert physics.diagonals.shape[0] == int(n_layers)
+    for diagonal in physics.diagonals:
+        assert diagonal.data_ptr() == physics.diagonals[0].data_ptr()
+
+    x = torch.randn(img_size, dtype=torch.cfloat, device=device).unsqueeze(0)
+    y = torch.randn((1, 1, 12, 12), dtype=torch.cfloat, device=device)
+    lhs = torch.vdot(physics.B(x).flatten(), y.flatten())
+    rhs = torch.vdot(x.flatten(), physics.B_adjoint(y).flatten())
+    assert torch.isclose(lhs, rhs, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("shared_weights", [False, True])
+def test_structured_random_phase_retrieval_state_dict(shared_weights, device):
+    r"""
+    Tests that a structured random phase retrieval operator can be restored from its state dict.
+
+    :param shared_weights: whether the diagonals are shared between layers.
+    :param device: (torch.device) cpu or cuda:x
+    :return: asserts both operators give the same measurements and adjoints.
+    """
+    img_size = (1, 10, 10)
+    kwargs = dict(
+        input_shape=img_size,
+        output_shape=img_size,
+        n_layers=2,
+        shared_weights=shared_weights,
+        device=device,
+    )
+    physics = dinv.physics.StructuredRandomPhaseRetrieval(**kwargs)
+    physics_loaded = dinv.physics.StructuredRandomPhaseRetrieval(**kwargs)
+    physics_loaded.load_state_dict(physics.state_dict())
+
+    x = torch.randn(img_size, dtype=torch.cfloat, device=device).unsqueeze(0)
+    assert torch.allclose(physics(x), physics_loaded(x))
+    y = physics.B(x)
+    assert torch.allclose(physics.B_adjoint(y), physics_loaded.B_adjoint(y))
+
+
+@pytest.mark.parametrize("diagonal_mode", ["uniform_phase", "rademacher"])
+def test_structured_random_phase_retrieval_rng(diagonal_mode, device):
+    r"""
+    Tests that the diagonals of the structured random phase retrieval operator are reproducible with a seeded generator.
+
+    :param diagonal_mode: sampling distribution of the diagonals.
+    :param device: (torch.device) cpu or cuda:x
+    :return: asserts operators built with the same seed are equal and differ from another seed.
+    """
+    kwargs = dict(
+        input_shape=(1, 10, 10),
+        output_shape=(1, 12, 12),
+        n_layers=2,
+        diagonal_mode=diagonal_mode,
+        device=device,
+    )
+    diagonals = [
+        dinv.physics.StructuredRandomPhaseRetrieval(
+            rng=torch.Generator(device).manual_seed(seed), **kwargs
+        ).diagonals
+        for seed in [0, 0, 1]
+    ]
+    assert torch.equal(diagonals[0], diagonals[1])
+    assert not torch.equal(diagonals[0], diagonals[2])
+    assert (
+        dinv.physics.StructuredRandomPhaseRetrieval(**kwargs).initial_random_state
+        is None
+    )
+
+
+@pytest.mark.parametrize("as_parameter", [False, True])
+def test_structured_random_diagonals_grad(as_parameter, device):
+    r"""
+    Tests that gradients of the structured random operator reach the diagonals supplied by the user.
+
+    :param as_parameter: whether the diagonals are given as a :class:`torch.nn.Parameter` or as a list of tensors.
+    :param device: (torch.device) cpu or cuda:x
+    :return: asserts the diagonals receive a gradient through both the operator and its adjoint.
+    """
+    img_size = (1, 6, 6)
+    diagonal = torch.randn(img_size, device=device)
+    if as_parameter:
+        diagonal = torch.nn.Parameter(diagonal.unsqueeze(0))
+        diagonals = diagonal
+    else:
+        diagonal.requires_grad_()
+        diagonals = [diagonal]
+    physics = dinv.physics.StructuredRandom(
+        input_shape=img_size,
+        output_shape=img_size,
+        n_layers=1,
+        diagonals=diagonals,
+        device=device,
+    )
+    if as_parameter:
+        assert any(p is diagonal for p in physics.parameters())
+
+    x = torch.randn((1,) + img_size, device=device)
+    loss = physics.A(x).abs().sum() + physics.A_adjoint(x).abs().sum()
+    loss.backward()
+    assert diagonal.grad is not None and diagonal.grad.abs().sum() > 0
+
+
+def test_structured_random_adjoint_after_update(device):
+    r"""
+    Tests that the adjoint of the structured random operator follows in-place updates of its diagonals.
+
+    :param device: (torch.device) cpu or cuda:x
+    :return: asserts the adjoint relation still holds after modifying the diagonals.
+    """
+    img_size = (1, 10, 10)
+    physics = dinv.physics.StructuredRandomPhaseRetrieval(
+        input_shape=img_size, output_shape=(1, 12, 12), n_layers=2, device=device
+    )
+    with torch.no_grad():
+        physics.B.diagonals.mul_(1j)
+
+    x = torch.randn((1,) + img_size, dtype=torch.cfloat, device=device)
+    y = torch.randn((1, 1, 12, 12), dtype=torch.cfloat, device=device)
+    lhs = torch.vdot(physics.B(x).flatten(), y.flatten())
+    rhs = torch.vdot(x.flatten(), physics.B_adjoint(y).flatten())
+    assert torch.isclose(lhs, rhs, rtol=1e-4, atol=1e-4)
+
+
 def test_phase_retrieval_Avjp(device):
     r"""
     Tests if the gradient computed with A_vjp method of phase retrieval is consistent with the autograd gradient.
@@ -731,6 +870,35 @@ def test_phase_retrieval_Avjp(device):
     assert torch.isclose(grad_value[0], jvp_value, rtol=1e-5).all()
 
 
+@pytest.mark.parametrize("name", ["random", "structured_undersampling"])
+def test_phase_retrieval_Avjp_vmap(name, device):
+    r"""
+    Tests that the A_vjp method of phase retrieval can be vectorized with :func:`torch.func.vmap` and leaves its input untouched.
+
+    :param name: operator to test, the structured one with zero layers has :math:`B(x)` a view of :math:`x`.
+    :param device: (torch.device) cpu or cuda:x
+    :return: assertion error if the vectorized product differs from the looped one or if the input is modified.
+    """
+    if name == "random":
+        img_size = (1, 3, 3)
+        physics = dinv.physics.RandomPhaseRetrieval(
+            m=10, img_shape=img_size, device=device
+        )
+    else:
+        img_size = (1, 6, 6)
+        physics = dinv.physics.StructuredRandomPhaseRetrieval(
+            input_shape=img_size, output_shape=(1, 4, 4), n_layers=0, device=device
+        )
+    x = torch.randn((2, 1) + img_size, dtype=torch.cfloat, device=device)
+    x_copy = x.clone()
+    v = torch.randn_like(physics.A(x[0]))
+
+    vjp_vmap = torch.func.vmap(lambda x: physics.A_vjp(x, v))(x)
+    vjp_loop = torch.stack([physics.A_vjp(x_i, v) for x_i in x])
+    assert torch.allclose(vjp_vmap, vjp_loop)
+    assert torch.equal(x, x_copy)
+
+
 def test_linear_physics_Avjp(device, rng):
     r"""
     Tests if the gradient computed with A_vjp method of linear physics is consistent with the autograd gradient.